@@ -1,17 +1,40 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
-import sqlite3, bcrypt, os
-from datetime import datetime, timedelta
+from flask import Flask, render_template, stream_template, request, redirect, url_for, session, flash, jsonify, g
+import sqlite3, bcrypt, os, time, queue, zlib
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
+from datetime import datetime, timedelta, date
+from calendar import monthrange
+try:
+    import orjson  # Optional fast JSON encoder for the task API
+except ImportError:
+    orjson = None
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-for-golden-turf-2024'
 
+# bcrypt work factor for new hashes; logins rehash older hashes to match, so it can be tuned per deployment
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+
+def hash_password(password):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
+
+# Every module a user can be granted, in the order the permissions form lists them; admins hold all of them
+AVAILABLE_PERMISSIONS = ('dashboard', 'payments', 'clients', 'calendar', 'products', 'products_list', 'invoice', 'quotes', 'profiles')
+ADMIN_PERMISSIONS = ','.join(AVAILABLE_PERMISSIONS)
+
+# Permission strings are shared by many users ('dashboard', the admin list), so each is split once
+@lru_cache(maxsize=1024)
+def parse_permissions(permissions):
+    return frozenset((permissions or '').split(','))
+
 # Template helper function for permission checking
 @app.template_global()
 def user_has_permission(module):
     if 'user_id' not in session: return False
     if session['user_id'] == 1: return True  # ID 1 always has access
-    user_permissions = session.get('user_permissions', '')
-    return module in (user_permissions or '').split(',')
+    return module in parse_permissions(session.get('user_permissions', ''))
 
 # Helper function to determine if user should see all data or just their own
 def should_see_all_data():
@@ -22,13 +45,9 @@ def should_see_all_data():
 
 # Helper function to determine if user should see all data for a specific module
 def should_see_all_data_for_module(module):
-    if 'user_id' not in session: return False
-    if session['user_id'] == 1: return True  # ID 1 sees all data
-    user_role = session.get('user_role', '')
-    if user_role == 'admin': return True  # Admin users see all data
-    # Users with specific permissions see all data for that module
-    user_permissions = session.get('user_permissions', '')
-    return module in (user_permissions or '').split(',')
+    if should_see_all_data(): return True  # ID 1 and admins see all data
+    # Users with specific permissions see all data for that module (a set lookup; the split is memoised)
+    return 'user_id' in session and module in parse_permissions(session.get('user_permissions', ''))
 
 # Helper function to get data query based on user permissions for specific module
 def get_data_filter_for_module(module):
@@ -37,6 +56,32 @@ def get_data_filter_for_module(module):
     else:
         return ('WHERE owner_id = ?', (session['user_id'],))  # Filter by owner
 
+# The two clauses get_data_filter_for_module() can return. Listing queries are built for both at import
+# and looked up by clause, so requests neither format SQL nor vary the text the statement cache sees
+OWNER_FILTERS = ('', 'WHERE owner_id = ?')
+
+# Valid client account types (set for O(1) membership checks on form posts)
+ACCOUNT_TYPES = frozenset({'Active', 'Deactivated'})
+CLIENT_FORM_FIELDS = ('contact_name', 'phone_number', 'account_type', 'company_name', 'email', 'actions')
+
+# Shared by the add and edit client forms: returns the stripped field values and the first validation error
+def read_client_form():
+    fields = [request.form.get(k, '').strip() for k in CLIENT_FORM_FIELDS]
+    contact_name, _, account_type, _, email, _ = fields
+    if not contact_name: return fields, 'Contact name is required.'
+    if account_type not in ACCOUNT_TYPES: return fields, 'Please select a valid account type.'
+    if not email or '@' not in email: return fields, 'Please enter a valid email address.'
+    return fields, None
+
+# Listing pages show PAGE_SIZE rows per page, selected with ?page=N
+PAGE_SIZE = 50
+
+# Invoice columns the payments and invoice tables display (skips the per-extra quantity columns)
+INVOICE_LIST_COLUMNS = 'id, client_name, turf_type, area, payment_status, gst, subtotal, total, extras, due_date'
+
+def get_page(param='page'):
+    return max(request.args.get(param, 1, type=int), 1)
+
 # Helper function to get data query based on user permissions (general)
 def get_data_filter():
     if should_see_all_data():
@@ -48,65 +93,131 @@ def get_data_filter():
 def register():
     if request.method == 'POST':
         name, email, password = request.form.get('name', '').strip(), request.form.get('email', '').strip(), request.form.get('password', '').strip()
-        if db_exec('SELECT id FROM users WHERE email = ?', (email,), 'one'):
+        # Cheap field checks first: a blank submission costs no query and no bcrypt hash
+        if not all([name, email, password]): flash('All fields are required')
+        elif db_exec('SELECT id FROM users WHERE email = ?', (email,), 'one'):
             flash('Email already registered')
         else:
-            hash_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-            db_exec('INSERT INTO users (name, email, password_hash, role, permissions) VALUES (?, ?, ?, ?, ?)', (name, email, hash_pw, 'user', 'dashboard'))
-            
-            # Check if this user got ID 1 - if so, make them admin automatically
-            new_user = db_exec('SELECT id FROM users WHERE email = ?', (email,), 'one')
-            if new_user and new_user[0] == 1:
-                db_exec('UPDATE users SET role = ?, permissions = ? WHERE id = ?', 
-                       ('admin', 'dashboard,payments,clients,calendar,products,products_list,invoice,quotes,profiles', 1))
-                flash('Registration successful! You have been granted admin access as the first user.')
-            else:
-                flash('Registration successful')
+            hash_pw = hash_password(password)
+            with db_transaction():
+                # The unique email index turns a registration that lost a race into a no-op instead of an
+                # IntegrityError; RETURNING hands back the new id without a second lookup
+                new_user = db_exec('INSERT INTO users (name, email, password_hash, role, permissions) VALUES (?, ?, ?, ?, ?) ON CONFLICT(email) DO NOTHING RETURNING id', (name, email, hash_pw, 'user', 'dashboard'), 'one')
+                
+                if not new_user:
+                    flash('Email already registered')
+                    return render_template('register.html')
+                # trg_users_first_admin_insert has already made user ID 1 an admin
+                if new_user['id'] == 1:
+                    flash('Registration successful! You have been granted admin access as the first user.')
+                else:
+                    flash('Registration successful')
             return redirect(url_for('login'))
     return render_template('register.html')
 # Database utilities
+DATABASE = 'users.db'
+
+# Keep at least as many idle connections as the server runs threads, or the extras are reopened per request
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '8'))
+# Seconds a writer waits on SQLite's busy handler for the write lock before 'database is locked'
+DB_BUSY_TIMEOUT = float(os.environ.get('DB_BUSY_TIMEOUT', '30'))
+
+# Idle connections are kept here between requests, so connect + PRAGMA setup happens once per connection
+_db_pool = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
+def connect_db():
+    # Pooled connections live long, so a larger statement cache keeps every route's SQL compiled
+    db = sqlite3.connect(DATABASE, timeout=DB_BUSY_TIMEOUT, check_same_thread=False, cached_statements=256)
+    db.row_factory = sqlite3.Row  # Rows are read by column name
+    # journal_mode=WAL is stored in the database file and set once by init_db(); these are per-connection
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.execute('PRAGMA cache_size=-64000')
+    db.execute('PRAGMA temp_store=MEMORY')
+    db.execute('PRAGMA mmap_size=268435456')
+    return db
+
+def get_db():
+    # One pooled connection per app context, reused by every db_exec call in the request
+    db = getattr(g, '_db', None)
+    if db is None:
+        try: db = _db_pool.get_nowait()
+        except queue.Empty: db = connect_db()
+        g._db = db
+    return db
+
+@app.teardown_appcontext
+def close_db(exception):
+    db = g.pop('_db', None)
+    if db is None: return
+    if db.in_transaction: db.rollback()  # Never hand a half-finished transaction to the next request
+    try: _db_pool.put_nowait(db)
+    except queue.Full: db.close()
+
+def close_db_pool():
+    while True:
+        try: _db_pool.get_nowait().close()
+        except queue.Empty: return
+
 def db_exec(query, params=(), fetch=None):
-    conn = sqlite3.connect('users.db')
-    c = conn.cursor()
-    c.execute(query, params)
+    conn = get_db()
+    changes = conn.total_changes
+    c = conn.execute(query, params)  # Cursor created in C, no separate cursor() call
     if fetch == 'one': result = c.fetchone()
     elif fetch == 'all': result = c.fetchall()
     else: result = None
-    conn.commit()
-    conn.close()
+    if not g.get('_db_tx'): conn.commit()  # db_transaction() commits once at the end instead
+    if conn.total_changes != changes: _cache.clear()  # Any write invalidates cached reads
     return result
 
-def reorganize_user_ids():
-    users = db_exec('SELECT id FROM users ORDER BY id', fetch='all')
-    for new_id, (old_id,) in enumerate(users, 1):
-        if new_id != old_id:
-            db_exec('UPDATE users SET id = ? WHERE id = ?', (new_id, old_id))
-    db_exec("DELETE FROM sqlite_sequence WHERE name='users'")
-    if users: db_exec("INSERT INTO sqlite_sequence (name, seq) VALUES ('users', ?)", (len(users),))
-
-def reset_clients_ids():
-    """Reset client IDs to start from 1 and fill gaps"""
-    clients = db_exec('SELECT id FROM clients ORDER BY id', fetch='all')
-    for new_id, (old_id,) in enumerate(clients, 1):
-        if new_id != old_id:
-            db_exec('UPDATE clients SET id = ? WHERE id = ?', (new_id, old_id))
-    db_exec("DELETE FROM sqlite_sequence WHERE name='clients'")
-    if clients: 
-        db_exec("INSERT INTO sqlite_sequence (name, seq) VALUES ('clients', ?)", (len(clients),))
-    else:
-        db_exec("INSERT INTO sqlite_sequence (name, seq) VALUES ('clients', 0)")
-
-def reset_invoices_ids():
-    """Reset invoice IDs to start from 1 and fill gaps"""
-    invoices = db_exec('SELECT id FROM invoices ORDER BY id', fetch='all')
-    for new_id, (old_id,) in enumerate(invoices, 1):
-        if new_id != old_id:
-            db_exec('UPDATE invoices SET id = ? WHERE id = ?', (new_id, old_id))
-    db_exec("DELETE FROM sqlite_sequence WHERE name='invoices'")
-    if invoices: 
-        db_exec("INSERT INTO sqlite_sequence (name, seq) VALUES ('invoices', ?)", (len(invoices),))
-    else:
-        db_exec("INSERT INTO sqlite_sequence (name, seq) VALUES ('invoices', 0)")
+@contextmanager
+def db_transaction():
+    # Group related writes into one transaction: the write lock is taken up front (BEGIN IMMEDIATE)
+    # and everything is committed once, or rolled back together on error
+    conn = get_db()
+    if g.get('_db_tx'):
+        # Nested: a savepoint lets the inner block fail on its own without abandoning the outer transaction
+        conn.execute('SAVEPOINT nested_tx')
+        try:
+            yield conn
+            conn.execute('RELEASE nested_tx')
+        except Exception:
+            conn.execute('ROLLBACK TO nested_tx')
+            conn.execute('RELEASE nested_tx')
+            raise
+        return
+    conn.execute('BEGIN IMMEDIATE')
+    g._db_tx = True
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        g._db_tx = False
+
+# Short-lived in-process cache for read-heavy pages (dashboard KPIs, task lists)
+CACHE_TTL = 30
+CACHE_MAX_ENTRIES = 512
+_cache = {}
+
+# Session fields the shared sidebar renders; part of the key for any cached full-page HTML
+def session_cache_key():
+    return tuple(session.get(k) for k in ('user_id', 'user_name', 'user_email', 'user_role', 'user_permissions'))
+
+def cached(key, loader, ttl=CACHE_TTL):
+    now = time.monotonic()
+    hit = _cache.get(key)
+    if hit and hit[0] > now: return hit[1]
+    value = loader()
+    if len(_cache) >= CACHE_MAX_ENTRIES:
+        # Versioned keys leave superseded entries behind; drop expired ones, or everything if still full.
+        # Other request threads may write meanwhile, so sweep a snapshot and tolerate keys already gone
+        for stale, (expires, _) in list(_cache.items()):
+            if expires <= now: _cache.pop(stale, None)
+        if len(_cache) >= CACHE_MAX_ENTRIES: _cache.clear()
+    _cache[key] = (now + ttl, value)
+    return value
 
 def has_permission(module):
     if 'user_id' not in session: return False
@@ -115,8 +226,12 @@ def has_permission(module):
     if session['user_id'] == 1:
         return True
     
-    user = db_exec('SELECT permissions FROM users WHERE id = ?', (session['user_id'],), 'one')
-    return user and module in (user[0] or '').split(',')
+    # Cached under the users data version: a write to users from any worker moves the key, so a grant or
+    # revoke applies on the next check everywhere, while unchanged permissions skip the row lookup
+    user_id = session['user_id']
+    user = cached(('permissions', user_id, get_data_version('users')),
+                  lambda: db_exec('SELECT permissions FROM users WHERE id = ?', (user_id,), 'one'))
+    return bool(user) and module in parse_permissions(user['permissions'])
 
 def migrate_users_table():
     # Migration has already been completed - just ensure columns exist
@@ -126,16 +241,16 @@ def migrate_users_table():
     except: pass
     # Ensure first user is admin
     first = db_exec('SELECT id FROM users ORDER BY id LIMIT 1', fetch='one')
-    if first: db_exec("UPDATE users SET role = ?, permissions = ? WHERE id = ?", ('admin', 'dashboard,payments,clients,calendar,products,products_list,invoice,quotes,profiles', first[0]))
+    if first: db_exec("UPDATE users SET role = ?, permissions = ? WHERE id = ?", ('admin', ADMIN_PERMISSIONS, first['id']))
 
 def ensure_admin_exists():
     # Always ensure ID 1 is admin if it exists
     user_id_1 = db_exec('SELECT id, role FROM users WHERE id = 1', fetch='one')
     if user_id_1:
-        if user_id_1[1] != 'admin':
+        if user_id_1['role'] != 'admin':
             print("Making user ID 1 admin (required for system security)...")
             db_exec('UPDATE users SET role = ?, permissions = ? WHERE id = 1', 
-                   ('admin', 'dashboard,payments,clients,calendar,products,products_list,invoice,quotes,profiles'))
+                   ('admin', ADMIN_PERMISSIONS))
             print("User ID 1 granted admin access!")
         else:
             print("User ID 1 already has admin access")
@@ -146,22 +261,20 @@ def ensure_admin_exists():
             # Get the first user by ID and make them admin
             first_user = db_exec('SELECT id FROM users ORDER BY id LIMIT 1', fetch='one')
             if first_user:
-                print(f"Setting user ID {first_user[0]} as admin...")
+                print(f"Setting user ID {first_user['id']} as admin...")
                 db_exec('UPDATE users SET role = ?, permissions = ? WHERE id = ?', 
-                       ('admin', 'dashboard,payments,clients,calendar,products,products_list,invoice,quotes,profiles', first_user[0]))
+                       ('admin', ADMIN_PERMISSIONS, first_user['id']))
                 print("Admin role assigned successfully!")
-            reorganize_user_ids()
 
 def authenticate_user(email, password):
-    user = db_exec('SELECT id, name, password_hash, permissions, role FROM users WHERE email = ?', (email,), 'one')
+    if not email or not password: return None  # Blank form: skip the lookup and the bcrypt check
+    user = db_exec('SELECT id, name, password_hash, permissions, role FROM users WHERE email = ? LIMIT 1', (email,), 'one')
     if not user: return None
-    # Check password_hash 
-    if user[2] and bcrypt.checkpw(password.encode('utf-8'), user[2]):
-        return user
-    # Default password fallback for users without password_hash
-    elif user[2] is None and password == 'Password123':
-        new_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        db_exec('UPDATE users SET password_hash = ? WHERE id = ?', (new_hash, user[0]))
+    # Check password_hash (users without one must set a password via forgot password)
+    if user['password_hash'] and bcrypt.checkpw(password.encode('utf-8'), user['password_hash']):
+        # The cost is the two digits after '$2b$'; rehash while the plain password is at hand if it changed
+        if int(user['password_hash'][4:6]) != BCRYPT_ROUNDS:
+            db_exec('UPDATE users SET password_hash = ? WHERE id = ?', (hash_password(password), user['id']))
         return user
     return None
 
@@ -212,31 +325,80 @@ def create_invoices_table():
         )''')
     except: pass
 
+def create_indexes():
+    # Index the columns routes filter and aggregate on so lookups avoid full table scans
+    # register() relies on this index for ON CONFLICT(email), so duplicate emails stop init instead of being skipped
+    try: db_exec('CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users(email)')
+    except sqlite3.IntegrityError as e:
+        app.logger.error(f'Cannot create the unique email index: merge or remove the users sharing an email first ({e})')
+        raise
+    db_exec('CREATE INDEX IF NOT EXISTS idx_invoices_client_name ON invoices(client_name, owner_id)')
+    db_exec('CREATE INDEX IF NOT EXISTS idx_tasks_date ON tasks(task_date)')
+    # Duplicate check on client create (owner + name + email)
+    db_exec('CREATE INDEX IF NOT EXISTS idx_clients_owner_name_email ON clients(owner_id, client_name, email)')
+    # Per-owner listings: the calendar's task window and the payments invoice list
+    db_exec('CREATE INDEX IF NOT EXISTS idx_tasks_owner_date ON tasks(owner_id, task_date, task_time)')
+    db_exec('CREATE INDEX IF NOT EXISTS idx_invoices_owner_created ON invoices(owner_id, created_date)')
+    # The /invoice list (newest first per owner) reads rows in index order instead of sorting them
+    db_exec('CREATE INDEX IF NOT EXISTS idx_invoices_owner_id ON invoices(owner_id, id DESC)')
+    # Dashboard paid-sales totals, per owner and across all owners: carrying total makes the sum index-only
+    db_exec('CREATE INDEX IF NOT EXISTS idx_invoices_status_created_total ON invoices(payment_status, created_date, total)')
+    db_exec('CREATE INDEX IF NOT EXISTS idx_invoices_owner_status_created ON invoices(owner_id, payment_status, created_date, total)')
+    # Refresh planner statistics so the new indexes are picked up
+    db_exec('ANALYZE')
+
+def create_triggers():
+    # Invoices reference clients by name and owner rather than a foreign key, so the cascade on
+    # client deletion is a trigger. Created after fix_clients_table_constraints, since rebuilding
+    # the clients table drops its triggers
+    db_exec('''CREATE TRIGGER IF NOT EXISTS trg_clients_delete_invoices AFTER DELETE ON clients
+               BEGIN DELETE FROM invoices WHERE client_name = OLD.client_name AND owner_id = OLD.owner_id; END''')
+    # Every write to these tables bumps a counter, giving all workers a cheap version to build ETags from
+    db_exec('CREATE TABLE IF NOT EXISTS data_version (name TEXT PRIMARY KEY, v INTEGER NOT NULL DEFAULT 0)')
+    for table in ('tasks', 'clients', 'invoices', 'users'):
+        db_exec('INSERT OR IGNORE INTO data_version (name, v) VALUES (?, 0)', (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            db_exec(f'''CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()} AFTER {event} ON {table}
+                        BEGIN UPDATE data_version SET v = v + 1 WHERE name = '{table}'; END''')
+    # The first user to register (id 1) is always an admin
+    db_exec(f'''CREATE TRIGGER IF NOT EXISTS trg_users_first_admin_insert AFTER INSERT ON users WHEN NEW.id = 1
+                BEGIN UPDATE users SET role = 'admin', permissions = '{ADMIN_PERMISSIONS}' WHERE id = 1; END''')
+
+def get_tasks_version():
+    return db_exec("SELECT v FROM data_version WHERE name = 'tasks'", fetch='one')['v']
+
+def get_data_version(*tables):
+    # Counters only grow, so their sum changes whenever any one of the tables is written
+    placeholders = ', '.join('?' * len(tables))
+    return db_exec(f'SELECT COALESCE(SUM(v), 0) AS v FROM data_version WHERE name IN ({placeholders})', tables, 'one')['v']
+
 def fix_clients_table_constraints():
     """Remove the problematic UNIQUE constraint on client_name"""
     try:
         # Check if the constraint exists
         result = db_exec("SELECT sql FROM sqlite_master WHERE type='table' AND name='clients'", fetch='one')
-        if result and 'UNIQUE(client_name)' in result[0]:
-            # Create a new table without the constraint
-            db_exec('''CREATE TABLE IF NOT EXISTS clients_new (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                client_name TEXT NOT NULL,
-                email TEXT,
-                phone TEXT,
-                account_type TEXT,
-                company_name TEXT,
-                actions TEXT,
-                created_date TEXT,
-                owner_id INTEGER
-            )''')
+        if result and 'UNIQUE(client_name)' in result['sql']:
+            # Rebuild in one transaction so a failure never leaves the table half-migrated
+            with db_transaction():
+                # Create a new table without the constraint
+                db_exec('''CREATE TABLE IF NOT EXISTS clients_new (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    client_name TEXT NOT NULL,
+                    email TEXT,
+                    phone TEXT,
+                    account_type TEXT,
+                    company_name TEXT,
+                    actions TEXT,
+                    created_date TEXT,
+                    owner_id INTEGER
+                )''')
             
-            # Copy data from old table to new table
-            db_exec('INSERT INTO clients_new SELECT * FROM clients')
+                # Copy data from old table to new table
+                db_exec('INSERT INTO clients_new SELECT * FROM clients')
             
-            # Drop old table and rename new table
-            db_exec('DROP TABLE clients')
-            db_exec('ALTER TABLE clients_new RENAME TO clients')
+                # Drop old table and rename new table
+                db_exec('DROP TABLE clients')
+                db_exec('ALTER TABLE clients_new RENAME TO clients')
             
             print("Fixed clients table constraints - removed UNIQUE constraint on client_name")
     except Exception as e:
@@ -247,33 +409,74 @@ def migrate_tasks_table():
     try: db_exec('ALTER TABLE tasks ADD COLUMN assigned_user_id INTEGER')
     except: pass
 
-def get_all_tasks(user_id=None):
+def get_all_tasks(user_id=None, start_date=None, end_date=None):
     # Get tasks owned by the current session user
     session_user_id = session.get('user_id')
     if not session_user_id:
         return []
     
+    # Assigned user's name is joined in so callers don't look it up per task
+    conditions, params = ['tasks.owner_id = ?'], [session_user_id]
     if user_id:
         # Filter by assigned user but still respect ownership
-        query = 'SELECT * FROM tasks WHERE owner_id = ? AND assigned_user_id = ? ORDER BY task_date, task_time'
-        params = (session_user_id, user_id)
-    else:
-        # Get all tasks owned by the current session user
-        query = 'SELECT * FROM tasks WHERE owner_id = ? ORDER BY task_date, task_time'
-        params = (session_user_id,)
-    return db_exec(query, params, 'all') or []
+        conditions.append('tasks.assigned_user_id = ?')
+        params.append(user_id)
+    if start_date and end_date:
+        # Restrict to a date window; ISO 'YYYY-MM-DD' strings compare in date order
+        conditions.append('task_date BETWEEN ? AND ?')
+        params += [start_date, end_date]
+    # status_class is the CSS suffix the calendar uses ('In progress' -> 'in-progress') and short_title the
+    # grid cell label (7 characters plus '...'); both are built by SQLite per row instead of in Jinja
+    query = f"""SELECT {TASK_LIST_COLUMNS}, users.name AS assigned_user_name, COALESCE(LOWER(REPLACE(tasks.status, ' ', '-')), 'none') AS status_class,
+                       CASE WHEN LENGTH(tasks.title) > 7 THEN SUBSTR(tasks.title, 1, 7) || '...' ELSE tasks.title END AS short_title
+                FROM tasks LEFT JOIN users ON users.id = tasks.assigned_user_id
+                WHERE {' AND '.join(conditions)} ORDER BY task_date, task_time"""
+    # Keyed on the data version (tasks, plus users for the joined name) so a write made by another worker,
+    # which doesn't clear this process's cache, is never served under a newer ETag or page key
+    return cached(('tasks', session_user_id, user_id, start_date, end_date, get_data_version('tasks', 'users')),
+                  lambda: db_exec(query, tuple(params), 'all') or [])
+
+# Bump when a step is added to the schema block in init_db() so existing databases pick it up
+SCHEMA_VERSION = 1
+
+def get_schema_version():
+    # PRAGMA user_version lives in the database header: no table to create or scan
+    return db_exec('PRAGMA user_version', fetch='one')['user_version']
+
+def set_schema_version(version):
+    db_exec(f'PRAGMA user_version = {int(version)}')
 
 # Initialize database
-migrate_users_table()
-ensure_admin_exists()
-create_tasks_table()
-create_clients_table()
-create_invoices_table()
-fix_clients_table_constraints()
-migrate_tasks_table()
-# Reset ID sequences to start from 1 and fill gaps
-reset_clients_ids()
-reset_invoices_ids()
+def init_db():
+    with app.app_context():
+        # WAL persists in the file: readers no longer block on the writer and commits skip the rollback journal
+        db_exec('PRAGMA journal_mode=WAL')
+        # Schema steps (ALTERs, table rebuilds, indexes) run once; later starts only read user_version.
+        # They share one transaction, so a fresh database pays a single commit instead of one per statement
+        if get_schema_version() < SCHEMA_VERSION:
+            with db_transaction():
+                migrate_users_table()
+                create_tasks_table()
+                create_clients_table()
+                create_invoices_table()
+                fix_clients_table_constraints()
+                migrate_tasks_table()
+                create_indexes()
+                create_triggers()
+                set_schema_version(SCHEMA_VERSION)
+        ensure_admin_exists()
+    # Don't carry connections opened at import into forked workers
+    close_db_pool()
+
+@app.cli.command('init-db')
+def init_db_command():
+    init_db()
+    print('Database initialized.')
+
+# Run schema setup once per start: the reloader child skips it (the parent already ran it), and
+# multi-worker deployments can set SKIP_DB_INIT=true and run `flask init-db` once instead
+if os.environ.get('SKIP_DB_INIT', 'False').lower() != 'true' and os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+    init_db()
 
 # Routes
 @app.route('/')
@@ -285,86 +488,76 @@ def login():
         email, password = request.form.get('email', '').strip(), request.form.get('password', '').strip()
         user = authenticate_user(email, password)
         if user:
-            session.update({'user_id': user[0], 'user_name': user[1], 'user_email': email, 'user_role': user[4], 'user_permissions': user[3]})
+            session.update({'user_id': user['id'], 'user_name': user['name'], 'user_email': email, 'user_role': user['role'], 'user_permissions': user['permissions']})
             return redirect(url_for('dashboard'))
         flash('Invalid credentials')
     return render_template('login.html')
 
+# Keyed by (clients clause, invoices clause); the invoice filter is extended with the payment status test
+DASHBOARD_TOTALS_SQL = {(client_where, invoice_where): f'''SELECT (SELECT COUNT(*) FROM clients {client_where}) AS total_clients,
+                               COALESCE(SUM(CASE WHEN created_date >= ? AND created_date < ? THEN total END), 0) AS today_sales,
+                               COALESCE(SUM(CASE WHEN created_date >= ? AND created_date < ? THEN total END), 0) AS yesterday_sales,
+                               COALESCE(SUM(CASE WHEN created_date >= ? THEN total END), 0) AS last_7_days_sales,
+                               COALESCE(SUM(total), 0) AS total_sales
+                        FROM invoices {invoice_where + ' AND' if invoice_where else 'WHERE'} payment_status = "Paid"'''
+                        for client_where in OWNER_FILTERS for invoice_where in OWNER_FILTERS}
+
 @app.route('/dashboard')
 def dashboard():
     if 'user_id' not in session: return redirect(url_for('login'))
     
-    # Get data filter based on user permissions for clients
+    # Get data filters based on user permissions for clients and payments/invoices
     client_filter_clause, client_params = get_data_filter_for_module('clients')
-    
-    # Get total clients
-    if client_filter_clause:
-        total_clients_result = db_exec(f'SELECT COUNT(*) FROM clients {client_filter_clause}', client_params, fetch='one')
-    else:
-        total_clients_result = db_exec('SELECT COUNT(*) FROM clients', fetch='one')
-    total_clients = total_clients_result[0] if total_clients_result else 0
-    
-    # Get admin users
-    admins = db_exec('SELECT id, name, email FROM users WHERE role = "admin" ORDER BY id', fetch='all') or []
-    
-    # Calculate sales KPIs
-    from datetime import datetime, timedelta
-    today = datetime.now().strftime('%Y-%m-%d')
-    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-    week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-    
-    # Get data filter for payments/invoices
     payment_filter_clause, payment_params = get_data_filter_for_module('payments')
     
-    # Today's sales (only paid invoices)  
-    if payment_filter_clause:
-        today_sales_result = db_exec(f'SELECT SUM(total) FROM invoices {payment_filter_clause} AND DATE(created_date) = ? AND payment_status = "Paid"', payment_params + (today,), fetch='one')
-    else:
-        today_sales_result = db_exec('SELECT SUM(total) FROM invoices WHERE DATE(created_date) = ? AND payment_status = "Paid"', (today,), fetch='one')
-    today_sales = today_sales_result[0] if today_sales_result and today_sales_result[0] else 0
-    
-    # Yesterday's sales (only paid invoices)
-    if payment_filter_clause:
-        yesterday_sales_result = db_exec(f'SELECT SUM(total) FROM invoices {payment_filter_clause} AND DATE(created_date) = ? AND payment_status = "Paid"', payment_params + (yesterday,), fetch='one')
-    else:
-        yesterday_sales_result = db_exec('SELECT SUM(total) FROM invoices WHERE DATE(created_date) = ? AND payment_status = "Paid"', (yesterday,), fetch='one')
-    yesterday_sales = yesterday_sales_result[0] if yesterday_sales_result and yesterday_sales_result[0] else 0
+    # Calculate sales KPIs
+    # All bounds come from one clock read so they agree across midnight; SQL compares them as ISO strings
+    today_d = date.today()
+    today = today_d.isoformat()
+    tomorrow = (today_d + timedelta(days=1)).isoformat()
+    yesterday = (today_d - timedelta(days=1)).isoformat()
+    week_ago = (today_d - timedelta(days=7)).isoformat()
     
-    # Last 7 days sales (only paid invoices)
-    if payment_filter_clause:
-        last_7_days_sales_result = db_exec(f'SELECT SUM(total) FROM invoices {payment_filter_clause} AND DATE(created_date) >= ? AND payment_status = "Paid"', payment_params + (week_ago,), fetch='one')
-    else:
-        last_7_days_sales_result = db_exec('SELECT SUM(total) FROM invoices WHERE DATE(created_date) >= ? AND payment_status = "Paid"', (week_ago,), fetch='one')
-    last_7_days_sales = last_7_days_sales_result[0] if last_7_days_sales_result and last_7_days_sales_result[0] else 0
+    # The page only changes with the tables it reads, the day, and the session fields the sidebar shows, so a
+    # browser that already holds this version is answered with an empty 304 before any KPI is computed
+    data_version = get_data_version('clients', 'invoices', 'users')
+    etag = f"dashboard-{session['user_id']}-{zlib.crc32(repr(session_cache_key()).encode())}-{data_version}-{today}"
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
     
-    # Total sales (only paid invoices)
-    if payment_filter_clause:
-        total_sales_result = db_exec(f'SELECT SUM(total) FROM invoices {payment_filter_clause} AND payment_status = "Paid"', payment_params, fetch='one')
-    else:
-        total_sales_result = db_exec('SELECT SUM(total) FROM invoices WHERE payment_status = "Paid"', fetch='one')
-    total_sales = total_sales_result[0] if total_sales_result and total_sales_result[0] else 0
+    def load_kpis():
+        # Get admin users
+        admins = db_exec('SELECT id, name, email FROM users WHERE role = "admin" ORDER BY id', fetch='all') or []
+        
+        # Total clients plus today's, yesterday's, last 7 days and total sales (only paid invoices) in one
+        # statement. created_date is stored as 'YYYY-MM-DD HH:MM:SS', so day ranges are plain string
+        # comparisons, with no DATE() per row
+        totals = db_exec(DASHBOARD_TOTALS_SQL[client_filter_clause, payment_filter_clause],
+                         client_params + (today, tomorrow, yesterday, today, week_ago) + payment_params, fetch='one')
+        return {'admins': admins, **totals}
     
-    return render_template('dashboard.html', 
-                         total_clients=total_clients, 
-                         admins=admins,
-                         today_sales=today_sales,
-                         yesterday_sales=yesterday_sales,
-                         last_7_days_sales=last_7_days_sales,
-                         total_sales=total_sales)
+    # Keyed on the same data version as the ETag: another worker's write doesn't clear this process's cache
+    kpis = cached(('dashboard', client_params, payment_params, today, data_version), load_kpis)
+    response = app.make_response(render_template('dashboard.html', **kpis))
+    response.set_etag(etag)
+    response.cache_control.no_cache = True  # Revalidate every load, so a 304 is never a stale guess
+    return response
 
 @app.route('/logout')
 def logout(): session.clear(); return redirect(url_for('login'))
 
+CLIENTS_PAGE_SQL = {where: f'SELECT id, client_name, email, phone, account_type, company_name FROM clients {where} ORDER BY id DESC LIMIT ? OFFSET ?'
+                    for where in OWNER_FILTERS}
+
 @app.route('/clients', methods=['GET', 'POST'])
 def clients():
     if 'user_id' not in session: return redirect(url_for('login'))
     if not has_permission('clients'): return render_template('access_restricted.html')
     error = success = None
     if request.method == 'POST':
-        contact_name, phone_number, account_type, company_name, email, actions = [request.form.get(k, '').strip() for k in ['contact_name', 'phone_number', 'account_type', 'company_name', 'email', 'actions']]
-        if not contact_name: error = 'Contact name is required.'
-        elif account_type not in ['Active', 'Deactivated']: error = 'Please select a valid account type.'
-        elif not email or '@' not in email: error = 'Please enter a valid email address.'
+        (contact_name, phone_number, account_type, company_name, email, actions), error = read_client_form()
         if not error:
             try:
                 # Check if client already exists for this user (to prevent confusion)
@@ -372,33 +565,28 @@ def clients():
                 if existing:
                     error = f'A client with the name "{contact_name}" and email "{email}" already exists.'
                 else:
-                    db_exec('INSERT INTO clients (client_name, email, phone, account_type, company_name, actions, created_date, owner_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (contact_name, email, phone_number, account_type, company_name, actions, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), session['user_id']))
+                    db_exec('INSERT INTO clients (client_name, email, phone, account_type, company_name, actions, created_date, owner_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', (contact_name, email, phone_number, account_type, company_name, actions, datetime.now().isoformat(sep=' ', timespec='seconds'), session['user_id']))
                     success = f'Client "{contact_name}" saved successfully.'
             except Exception as e: error = f'Failed to save client: {str(e)}'
     # Get data based on user permissions for clients
     where_clause, params = get_data_filter_for_module('clients')
-    if where_clause:
-        client_list = db_exec(f'SELECT * FROM clients {where_clause} ORDER BY id DESC', params, 'all') or []
-    else:
-        client_list = db_exec('SELECT * FROM clients ORDER BY id DESC', (), 'all') or []
-    return render_template('clients.html', clients=client_list, error=error, success=success)
+    # One page of clients; one extra row is fetched to tell whether a next page exists
+    page = get_page()
+    client_list = db_exec(CLIENTS_PAGE_SQL[where_clause], params + (PAGE_SIZE + 1, (page - 1) * PAGE_SIZE), 'all') or []
+    return render_template('clients.html', clients=client_list[:PAGE_SIZE], page=page, has_next=len(client_list) > PAGE_SIZE, error=error, success=success)
 
 @app.route('/clients/edit/<int:client_id>', methods=['GET', 'POST'])
 def edit_client(client_id):
     if 'user_id' not in session: return redirect(url_for('login'))
     if not has_permission('clients'): return render_template('access_restricted.html')
+    # Fetched once up front; a failed validation redisplays this row instead of querying again
+    client = db_exec('SELECT id, client_name, phone, account_type, company_name, email, actions FROM clients WHERE id = ? AND owner_id = ?', (client_id, session['user_id']), 'one')
     if request.method == 'POST':
-        contact_name, phone_number, account_type, company_name, email, actions = [request.form.get(k, '').strip() for k in ['contact_name', 'phone_number', 'account_type', 'company_name', 'email', 'actions']]
-        error = None
-        if not contact_name: error = 'Contact name is required.'
-        elif account_type not in ['Active', 'Deactivated']: error = 'Please select a valid account type.'
-        elif not email or '@' not in email: error = 'Please enter a valid email address.'
+        (contact_name, phone_number, account_type, company_name, email, actions), error = read_client_form()
         if not error:
             db_exec('UPDATE clients SET client_name=?, phone=?, account_type=?, company_name=?, email=?, actions=? WHERE id=? AND owner_id=?', (contact_name, phone_number, account_type, company_name, email, actions, client_id, session['user_id']))
             return redirect(url_for('clients'))
-        client = db_exec('SELECT id, client_name, phone, account_type, company_name, email, actions FROM clients WHERE id = ? AND owner_id = ?', (client_id, session['user_id']), 'one')
         return render_template('edit_client.html', client=client, error=error)
-    client = db_exec('SELECT id, client_name, phone, account_type, company_name, email, actions FROM clients WHERE id = ? AND owner_id = ?', (client_id, session['user_id']), 'one')
     return render_template('edit_client.html', client=client, error="Client not found." if not client else None)
 
 @app.route('/clients/delete/<int:client_id>', methods=['POST'])
@@ -408,77 +596,107 @@ def delete_client(client_id):
     # Get client name before deletion for cleanup
     client = db_exec('SELECT client_name FROM clients WHERE id = ? AND owner_id = ?', (client_id, session['user_id']), 'one')
     if client:
-        client_name = client[0]
-        # Delete the client
+        client_name = client['client_name']
+        # Delete the client; the trg_clients_delete_invoices trigger removes their invoices in the same statement.
+        # Ids are left as they are: renumbering rewrote every later client row (and could repoint another
+        # user's open edit link) on each delete
         db_exec('DELETE FROM clients WHERE id = ? AND owner_id = ?', (client_id, session['user_id']))
-        # Clean up any references to this client in other tables (if they exist)
-        try:
-            # Example: Clean up invoices that reference this client
-            db_exec('DELETE FROM invoices WHERE client_name = ? AND owner_id = ?', (client_name, session['user_id']))
-        except:
-            pass  # Invoices table might not exist yet
-        # Reset client IDs to start from 1 and fill gaps
-        reset_clients_ids()
         flash(f'Client "{client_name}" deleted successfully.')
     else:
         flash('Client not found or access denied.')
     return redirect(url_for('clients'))
 
+# The payments tabs sort and filter in SQL, so every page (and a print) follows the same order over all rows.
+# Keys are the <select> option values; only these ORDER BY texts ever reach the query
+# Every order ends on id, so rows with equal sort values keep one order and LIMIT/OFFSET pages neither repeat nor skip them
+PAYMENTS_INVOICE_SORTS = {'': 'created_date DESC, id DESC',
+                          'status-asc': 'payment_status, id', 'status-desc': 'payment_status DESC, id',
+                          'due_date-asc': 'due_date, id', 'due_date-desc': 'due_date DESC, id',
+                          'client_name-asc': 'client_name, id', 'client_name-desc': 'client_name DESC, id',
+                          'total-asc': 'total, id', 'total-desc': 'total DESC, id'}
+PAYMENTS_CLIENT_SORTS = {'': 'client_name, id',
+                         'client_name-asc': 'client_name, id', 'client_name-desc': 'client_name DESC, id',
+                         'account_type-asc': 'account_type, client_name, id', 'account_type-desc': 'account_type DESC, client_name, id',
+                         'email-asc': 'email, id', 'email-desc': 'email DESC, id'}
+PAYMENT_STATUSES = frozenset({'Paid', 'Unpaid'})
+
+# Keyed by (owner clause, whether the status/account type filter applies, sort option)
+PAYMENTS_CLIENTS_SQL = {(where, filtered, sort): f'''SELECT id, client_name, email, phone, account_type, company_name, actions FROM clients
+                            {where}{(' AND' if where else 'WHERE') + ' account_type = ?' if filtered else ''} ORDER BY {order} LIMIT ? OFFSET ?'''
+                        for where in OWNER_FILTERS for filtered in (False, True) for sort, order in PAYMENTS_CLIENT_SORTS.items()}
+PAYMENTS_INVOICES_SQL = {(where, filtered, sort): f'''SELECT {INVOICE_LIST_COLUMNS} FROM invoices
+                             {where}{(' AND' if where else 'WHERE') + ' payment_status = ?' if filtered else ''} ORDER BY {order} LIMIT ? OFFSET ?'''
+                         for where in OWNER_FILTERS for filtered in (False, True) for sort, order in PAYMENTS_INVOICE_SORTS.items()}
+
 @app.route('/payments')
 def payments():
     if 'user_id' not in session: return redirect(url_for('login'))
     if not has_permission('payments'): return render_template('access_restricted.html')
+    # Each tab pages on its own argument, and sorts and filters in SQL so the order holds across pages.
+    # Printing a tab (?print=invoices|clients) renders every row of it instead of one page
+    print_section = request.args.get('print', '')
+    def load_list(sql, params, section):
+        if print_section == section: return db_exec(sql, params + (-1, 0), 'all') or [], 1, False
+        page = get_page(f'{section}_page')
+        # One extra row is fetched to tell whether a next page exists
+        rows = db_exec(sql, params + (PAGE_SIZE + 1, (page - 1) * PAGE_SIZE), 'all') or []
+        return rows[:PAGE_SIZE], page, len(rows) > PAGE_SIZE
+    invoice_sort, client_sort = request.args.get('invoice_sort', ''), request.args.get('client_sort', '')
+    if invoice_sort not in PAYMENTS_INVOICE_SORTS: invoice_sort = ''
+    if client_sort not in PAYMENTS_CLIENT_SORTS: client_sort = ''
+    status, account_type = request.args.get('status', 'all'), request.args.get('account_type', 'all')
+    
     # Get data based on user permissions for clients
     clients_where_clause, clients_params = get_data_filter_for_module('clients')
-    if clients_where_clause:
-        clients_data = db_exec(f'SELECT * FROM clients {clients_where_clause} ORDER BY client_name', clients_params, 'all') or []
-    else:
-        clients_data = db_exec('SELECT * FROM clients ORDER BY client_name', (), 'all') or []
-    # Convert to objects for easier template access
-    clients = []
-    for client in clients_data:
-        clients.append({
-            'id': client[0],
-            'client_name': client[1],
-            'email': client[2],
-            'phone': client[3],
-            'account_type': client[4],
-            'company_name': client[5],
-            'actions': client[6],
-            'created_date': client[7]
-        })
+    if account_type in ACCOUNT_TYPES: clients_params += (account_type,)
+    clients_data, clients_page, clients_has_next = load_list(
+        PAYMENTS_CLIENTS_SQL[clients_where_clause, account_type in ACCOUNT_TYPES, client_sort], clients_params, 'clients')
     
     # Get invoices based on user permissions for payments
     invoices_where_clause, invoices_params = get_data_filter_for_module('payments')
-    if invoices_where_clause:
-        invoices_data = db_exec(f'SELECT * FROM invoices {invoices_where_clause} ORDER BY created_date DESC', invoices_params, 'all') or []
-    else:
-        invoices_data = db_exec('SELECT * FROM invoices ORDER BY created_date DESC', (), 'all') or []
+    if status in PAYMENT_STATUSES: invoices_params += (status,)
+    invoices_data, invoices_page, invoices_has_next = load_list(
+        PAYMENTS_INVOICES_SQL[invoices_where_clause, status in PAYMENT_STATUSES, invoice_sort], invoices_params, 'invoices')
     
-    return render_template('payments.html', clients=clients, invoices=invoices_data)
+    return render_template('payments.html', clients=clients_data, invoices=invoices_data, print_section=print_section,
+                           clients_page=clients_page, clients_has_next=clients_has_next,
+                           invoices_page=invoices_page, invoices_has_next=invoices_has_next,
+                           invoice_sort=invoice_sort, client_sort=client_sort, status=status, account_type=account_type)
 
 @app.route('/calendar')
 def calendar():
     if 'user_id' not in session: return redirect(url_for('login'))
     if not has_permission('calendar'): return render_template('access_restricted.html')
     
-    from calendar import monthrange
-    
     actual_today = datetime.now().date()
     current_year, current_month, current_day = request.args.get('year', actual_today.year, type=int), request.args.get('month', actual_today.month, type=int), request.args.get('day', actual_today.day, type=int)
-    view, current_date = request.args.get('view', 'month'), datetime(current_year, current_month, current_day)
+    view = request.args.get('view', 'month')
+    
+    # Serve the rendered page from cache until the tasks (or the assigned users' names) change; the data
+    # version also catches writes made by other workers, which don't clear this process's cache
+    data_version = get_data_version('tasks', 'users')
+    page_key = ('calendar_html', session_cache_key(), view, current_year, current_month, current_day, actual_today, data_version)
+    return cached(page_key, lambda: render_calendar(view, current_year, current_month, current_day, actual_today))
+
+def render_calendar(view, current_year, current_month, current_day, actual_today):
+    current_date = datetime(current_year, current_month, current_day)
     
-    # Get all tasks owned by the user (not filtered by assigned user)
+    # Get all tasks owned by the user (not filtered by assigned user) for the task list
     tasks = get_all_tasks()
     
-    # Build tasks by date dictionary
-    tasks_by_date = {}
-    for task in tasks:
-        if task[3]:  # task_date
-            task_date = datetime.strptime(task[3], '%Y-%m-%d').date()
-            if task_date not in tasks_by_date:
-                tasks_by_date[task_date] = []
-            tasks_by_date[task_date].append(task)
+    # Only the tasks inside the visible month/week are needed for the calendar grid
+    if view == 'week':
+        current_date_obj = current_date.date()
+        range_start = current_date_obj - timedelta(days=(current_date_obj.weekday() + 1) % 7)
+        range_end = range_start + timedelta(days=6)
+    else:
+        range_start = datetime(current_year, current_month, 1).date()
+        range_end = datetime(current_year, current_month, monthrange(current_year, current_month)[1]).date()
+    view_tasks = get_all_tasks(start_date=range_start.isoformat(), end_date=range_end.isoformat())
+    
+    # Build tasks by date dictionary keyed by the stored 'YYYY-MM-DD' string, so no row is parsed
+    # get_all_tasks() orders by task_date, so each day's tasks are already one contiguous run
+    tasks_by_date = {day: list(day_tasks) for day, day_tasks in groupby(view_tasks, key=itemgetter('task_date')) if day}
     
     # Generate calendar data
     calendar_data = []
@@ -498,8 +716,8 @@ def calendar():
         
         # Add actual days of the month
         for day in range(1, days_in_month + 1):
-            current_day_date = datetime(current_year, current_month, day).date()
-            day_tasks = tasks_by_date.get(current_day_date, [])
+            current_day_date = date(current_year, current_month, day)
+            day_tasks = tasks_by_date.get(f'{current_year:04d}-{current_month:02d}-{day:02d}', [])
             is_today = current_day_date == actual_today
             
             calendar_data.append({
@@ -510,15 +728,13 @@ def calendar():
             })
     
     elif view == 'week':
-        # Calculate week start (Sunday)
-        current_date_obj = datetime(current_year, current_month, current_day).date()
-        days_since_sunday = (current_date_obj.weekday() + 1) % 7
-        week_start = current_date_obj - timedelta(days=days_since_sunday)
+        # Week starts on Sunday (computed above as range_start)
+        week_start = range_start
         
         # Generate 7 days for the week
         for i in range(7):
             day_date = week_start + timedelta(days=i)
-            day_tasks = tasks_by_date.get(day_date, [])
+            day_tasks = tasks_by_date.get(day_date.isoformat(), [])
             is_today = day_date == actual_today
             
             calendar_data.append({
@@ -538,9 +754,8 @@ def calendar():
     else:
         header_text = f"{current_date.strftime('%B %d, %Y')}"
     
-    # Get all users for task assignment
-    users_data = db_exec('SELECT id, name, email, role FROM users ORDER BY role DESC, name', fetch='all') or []
-    users = [{'id': user[0], 'name': user[1], 'email': user[2], 'role': user[3]} for user in users_data]
+    # Get all users for task assignment; the template reads the rows by name, so they are passed as-is
+    users = db_exec('SELECT id, name FROM users ORDER BY role DESC, name', fetch='all') or []
     
     return render_template('calendar.html', 
                          tasks=tasks, 
@@ -556,7 +771,11 @@ def calendar():
 @app.route('/products')
 def products():
     if not has_permission('products'): return render_template('access_restricted.html')
-    return render_template('products.html')
+    # The page is static apart from the sidebar, so one render per user is reused
+    return cached(('products_html', session_cache_key()), lambda: render_template('products.html'))
+
+# Stock and price figures shown on the products list, built once at import
+PRODUCT_LIST_DATA = {'bamboo_24m_stock': 10, 'bamboo_24m_price': 25.00, 'bamboo_2m_stock': 15, 'bamboo_2m_price': 20.00, 'bamboo_18m_stock': 12, 'bamboo_18m_price': 18.00, 'pebbles_black_stock': 50, 'pebbles_black_price': 5.00, 'pebbles_white_stock': 45, 'pebbles_white_price': 5.50, 'fountain_stock': 3, 'fountain_price': 'Custom Quote', 'premium_stock': 20, 'premium_price': 35.00, 'green_lush_stock': 25, 'green_lush_price': 30.00, 'natural_40mm_stock': 18, 'natural_40mm_price': 32.00, 'golf_turf_stock': 22, 'golf_turf_price': 40.00, 'imperial_lush_stock': 16, 'imperial_lush_price': 38.00, 'pegs_stock': 100, 'pegs_price': 2.50, 'artificial_hedges_stock': 30, 'artificial_hedges_price': 15.00, 'adhesive_tape_stock': 25, 'adhesive_tape_price': 8.00}
 
 @app.route('/products_list', methods=['GET', 'POST'])
 def products_list():
@@ -566,8 +785,7 @@ def products_list():
             flash('Product data updated successfully')
             return redirect(url_for('products_list'))
         except Exception as e: flash(f'Error processing product data: {str(e)}')
-    product_data = {'bamboo_24m_stock': 10, 'bamboo_24m_price': 25.00, 'bamboo_2m_stock': 15, 'bamboo_2m_price': 20.00, 'bamboo_18m_stock': 12, 'bamboo_18m_price': 18.00, 'pebbles_black_stock': 50, 'pebbles_black_price': 5.00, 'pebbles_white_stock': 45, 'pebbles_white_price': 5.50, 'fountain_stock': 3, 'fountain_price': 'Custom Quote', 'premium_stock': 20, 'premium_price': 35.00, 'green_lush_stock': 25, 'green_lush_price': 30.00, 'natural_40mm_stock': 18, 'natural_40mm_price': 32.00, 'golf_turf_stock': 22, 'golf_turf_price': 40.00, 'imperial_lush_stock': 16, 'imperial_lush_price': 38.00, 'pegs_stock': 100, 'pegs_price': 2.50, 'artificial_hedges_stock': 30, 'artificial_hedges_price': 15.00, 'adhesive_tape_stock': 25, 'adhesive_tape_price': 8.00}
-    return render_template('products_list.html', **product_data)
+    return render_template('products_list.html', **PRODUCT_LIST_DATA)
 
 @app.route('/profiles', methods=['GET', 'POST'])
 def profiles():
@@ -579,16 +797,18 @@ def profiles():
             if not all([name, email, password]): flash('All fields are required')
             elif db_exec('SELECT id FROM users WHERE email = ?', (email,), 'one'): flash('Email already exists')
             else:
-                hash_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+                hash_pw = hash_password(password)
                 user_role = 'admin' if request.form.get('role') == 'admin' else 'user'
-                permissions = 'dashboard,payments,clients,calendar,products,products_list,invoice,quotes,profiles' if user_role == 'admin' else 'dashboard'
+                permissions = ADMIN_PERMISSIONS if user_role == 'admin' else 'dashboard'
+                # An insert takes the next id, so it never opens a gap and needs no renumber
                 db_exec('INSERT INTO users (name, email, password_hash, role, permissions) VALUES (?, ?, ?, ?, ?)', (name, email, hash_pw, user_role, permissions))
-                reorganize_user_ids()
                 flash('User created successfully')
                 return redirect(url_for('profiles'))
         except Exception as e: flash(f'Error creating user: {str(e)}')
-    users = db_exec('SELECT id, name, email, role FROM users ORDER BY id', fetch='all') or []
-    return render_template('profiles.html', users=users)
+    # One page of users; one extra row is fetched to tell whether a next page exists
+    page = get_page()
+    users = db_exec('SELECT id, name, email, role FROM users ORDER BY id LIMIT ? OFFSET ?', (PAGE_SIZE + 1, (page - 1) * PAGE_SIZE), 'all') or []
+    return render_template('profiles.html', users=users[:PAGE_SIZE], page=page, has_next=len(users) > PAGE_SIZE)
 
 @app.route('/toggle_admin/<int:user_id>', methods=['POST'])
 def toggle_admin(user_id):
@@ -596,19 +816,24 @@ def toggle_admin(user_id):
     if not has_permission('profiles'): return render_template('access_restricted.html')
     current_user = db_exec('SELECT role FROM users WHERE id = ?', (user_id,), 'one')
     if current_user:
-        new_role = 'user' if current_user[0] == 'admin' else 'admin'
+        new_role = 'user' if current_user['role'] == 'admin' else 'admin'
         new_permissions = 'dashboard,payments,clients,calendar,products,profiles' if new_role == 'admin' else 'dashboard'
         db_exec('UPDATE users SET role = ?, permissions = ? WHERE id = ?', (new_role, new_permissions, user_id))
         ensure_admin_exists()
+        # Keep the editor's own session in step (user 1 is put back to admin by ensure_admin_exists)
+        if user_id == session['user_id'] and user_id != 1:
+            session.update({'user_role': new_role, 'user_permissions': new_permissions})
     return redirect(url_for('profiles'))
 
 @app.route('/delete_user/<int:user_id>', methods=['POST'])
 def delete_user(user_id):
     if 'user_id' not in session: return redirect(url_for('login'))
     if not has_permission('profiles'): return render_template('access_restricted.html')
-    if user_id == session['user_id']: ensure_admin_exists()
-    db_exec('DELETE FROM users WHERE id = ?', (user_id,))
-    reorganize_user_ids()
+    # Ids are never renumbered: clients, invoices and tasks point at them through owner_id, so a shifted id
+    # (or a reused one) would hand that data to another account. Admin continuity comes from the role instead
+    with db_transaction():
+        db_exec('DELETE FROM users WHERE id = ?', (user_id,))
+        ensure_admin_exists()
     if user_id == session['user_id']: return redirect(url_for('logout'))
     return redirect(url_for('profiles'))
 
@@ -623,11 +848,11 @@ def edit_user(user_id):
             name, email = request.form.get('name'), request.form.get('email')
             if not all([name, email]): flash('Name and email are required')
             else:
-                existing = db_exec('SELECT id FROM users WHERE email = ? AND id != ?', (email, user_id), 'one')
-                if existing: flash('Email already exists')
+                user_role = 'admin' if request.form.get('role') == 'admin' else 'user'
+                # The unique idx_users_email index rejects an email taken by another user, so no probe query first
+                try: db_exec('UPDATE users SET name = ?, email = ?, role = ? WHERE id = ?', (name, email, user_role, user_id))
+                except sqlite3.IntegrityError: flash('Email already exists')
                 else:
-                    user_role = 'admin' if request.form.get('role') == 'admin' else 'user'
-                    db_exec('UPDATE users SET name = ?, email = ?, role = ? WHERE id = ?', (name, email, user_role, user_id))
                     ensure_admin_exists()
                     flash('User updated successfully - use Permissions button to manage access')
                     return redirect(url_for('profiles'))
@@ -643,14 +868,8 @@ def manage_permissions(user_id):
     
     if request.method == 'POST':
         try:
-            # Get all available permissions
-            available_permissions = ['dashboard', 'payments', 'clients', 'calendar', 'products', 'products_list', 'invoice', 'quotes', 'profiles']
-            selected_permissions = []
-            
             # Check which permissions were selected
-            for permission in available_permissions:
-                if request.form.get(f'permission_{permission}'):
-                    selected_permissions.append(permission)
+            selected_permissions = [permission for permission in AVAILABLE_PERMISSIONS if request.form.get(f'permission_{permission}')]
             
             # Ensure at least dashboard permission
             if 'dashboard' not in selected_permissions:
@@ -659,14 +878,16 @@ def manage_permissions(user_id):
             # Save permissions to database
             permissions_string = ','.join(selected_permissions)
             db_exec('UPDATE users SET permissions = ? WHERE id = ?', (permissions_string, user_id))
+            # has_permission() sees it on the next check (the write moved the users data version its cache is keyed on); the sidebar reads the session
+            if user_id == session['user_id']: session['user_permissions'] = permissions_string
             
-            flash(f'Permissions updated successfully for {user[1]}')
+            flash(f'Permissions updated successfully for {user["name"]}')
             return redirect(url_for('profiles'))
         except Exception as e: 
             flash(f'Error updating permissions: {str(e)}')
     
     # Parse current permissions
-    current_permissions = (user[4] or '').split(',') if user[4] else []
+    current_permissions = parse_permissions(user['permissions'])  # Set: the template tests each checkbox with `in`
     return render_template('manage_permissions.html', user=user, current_permissions=current_permissions)
 
 @app.route('/forgotpassword', methods=['GET', 'POST'])
@@ -682,7 +903,7 @@ def forgotpassword():
         user = db_exec('SELECT id FROM users WHERE email = ?', (email,), 'one')
         if user:
             # Hash the new password and update the user
-            new_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
+            new_hash = hash_password(new_password)
             db_exec('UPDATE users SET password_hash = ? WHERE email = ?', (new_hash, email))
             flash('Password updated successfully! You can now login with your new password.')
             return redirect(url_for('login'))
@@ -690,6 +911,9 @@ def forgotpassword():
             flash('Email address not found.')
     return render_template('forgotpassword.html')
 
+# Per-m2 turf prices used by quotes and the edit invoice form, built once at import
+QUOTE_TURF_PRICES = {'Golden Imperial Lush': 15.00, 'Golden Green Lush': 19.00, 'Golden Natural 40mm': 17.00, 'Golden Golf Turf': 22.00, 'Golden Premium Turf': 20.00}
+
 @app.route('/quotes', methods=['GET', 'POST'])
 def quotes():
     if 'user_id' not in session: return redirect(url_for('login'))
@@ -702,22 +926,36 @@ def quotes():
         area = float(area_str) if area_str else 0
         other_products = request.form.get('other_products', '')
         # Calculate total price (simplified calculation)
-        turf_prices = {'Golden Imperial Lush': 15, 'Golden Green Lush': 19, 'Golden Natural 40mm': 17, 'Golden Golf Turf': 22, 'Golden Premium Turf': 20}
-        turf_price = turf_prices.get(turf_type, 0)
-        total_price = area * turf_price
+        total_price = area * QUOTE_TURF_PRICES.get(turf_type, 0)
         summary = {'client_name': client_name, 'turf_type': turf_type, 'area_in_sqm': area, 'other_products': other_products, 'total_price': total_price}
         flash('Quote generated successfully!')
         return render_template('quotes.html', summary=summary)
     return render_template('quotes.html')
 
+# Invoice pricing, built once at import instead of on every invoice POST
+INVOICE_TURF_PRICES = {'Golden Imperial Lush': 38.00, 'Golden Green Lush': 30.00, 'Golden Natural 40mm': 32.00, 'Golden Golf Turf': 40.00, 'Golden Premium Turf': 35.00}
+BAMBOO_PRICES = {'2m': 20.00, '2.4m': 25.00, '1.8m': 18.00}
+TURF_TYPES = frozenset(INVOICE_TURF_PRICES)  # Hash lookup for validating the posted turf type
+EXTRAS_COSTS = {'artificial_hedges': 15.00, 'pebbles': 5.50, 'pegs': 2.50, 'adhesive_tape': 8.00}  # Per-unit; pebbles use the average price
+# Numeric extras on the invoice form, in the order invoice() unpacks them
+INVOICE_NUMBER_FIELDS = (('artificial_hedges_qty', int), ('fountain_price', float), ('bamboo_products_qty', int),
+                         ('pebbles_qty', int), ('pegs_qty', int), ('adhesive_tape_qty', int))
+
+def form_number(name, cast):
+    # Blank fields (the usual case for unused extras) return 0 without going through an exception
+    value = request.form.get(name, '').strip()
+    if not value: return 0
+    try: return cast(value)
+    except ValueError: return 0
+
+INVOICE_PAGE_SQL = f'SELECT {INVOICE_LIST_COLUMNS} FROM invoices WHERE owner_id = ? ORDER BY id DESC LIMIT ? OFFSET ?'
+
 @app.route('/invoice', methods=['GET', 'POST'])
 def invoice():
     if 'user_id' not in session: return redirect(url_for('login'))
     if not has_permission('invoice'): return render_template('access_restricted.html')
     
     if request.method == 'POST':
-        print("DEBUG: Invoice form submitted")  # Debug line
-        print(f"DEBUG: Form data: {dict(request.form)}")  # Debug line
         try:
             # Get form data
             client_name = request.form.get('client_name', '').strip()
@@ -727,82 +965,43 @@ def invoice():
             payment_status = request.form.get('payment_status', '').strip()
             gst_checkbox = request.form.get('gst')
             
-            print(f"DEBUG: Parsed - client_name: {client_name}, turf_type: {turf_type}, area: {area}, payment_status: {payment_status}")
-            
-            # Extras data - handle empty strings better
-            try:
-                artificial_hedges_qty = int(request.form.get('artificial_hedges_qty', '0') or '0')
-            except ValueError:
-                artificial_hedges_qty = 0
-            
-            try:
-                fountain_price = float(request.form.get('fountain_price', '0') or '0')
-            except ValueError:
-                fountain_price = 0
-                
+            # Extras data; blank or malformed numbers count as 0
+            artificial_hedges_qty, fountain_price, bamboo_products_qty, pebbles_qty, pegs_qty, adhesive_tape_qty = (
+                form_number(name, cast) for name, cast in INVOICE_NUMBER_FIELDS)
             bamboo_products_size = request.form.get('bamboo_products_size', 'none')
-            
-            try:
-                bamboo_products_qty = int(request.form.get('bamboo_products_qty', '0') or '0')
-            except ValueError:
-                bamboo_products_qty = 0
-                
             pebbles_custom_type = request.form.get('pebbles_custom_type', '')
             
-            try:
-                pebbles_qty = int(request.form.get('pebbles_qty', '0') or '0')
-            except ValueError:
-                pebbles_qty = 0
-                
-            try:
-                pegs_qty = int(request.form.get('pegs_qty', '0') or '0')
-            except ValueError:
-                pegs_qty = 0
-                
-            try:
-                adhesive_tape_qty = int(request.form.get('adhesive_tape_qty', '0') or '0')
-            except ValueError:
-                adhesive_tape_qty = 0
-            
             # Basic validation - make client_name the only required field
             if not client_name:
                 flash('Client name is required')
                 raise ValueError('Client name required')
             
+            if turf_type and turf_type != 'none' and turf_type not in TURF_TYPES:
+                flash('Please select a valid turf type')
+                raise ValueError('Unknown turf type')
+            
             # Make payment status default to Unpaid if not provided
             if not payment_status:
                 payment_status = 'Unpaid'
             
-            # Calculate pricing
-            turf_prices = {
-                'Golden Imperial Lush': 38.00,
-                'Golden Green Lush': 30.00,
-                'Golden Natural 40mm': 32.00,
-                'Golden Golf Turf': 40.00,
-                'Golden Premium Turf': 35.00
-            }
-            
             # Calculate subtotal
             subtotal = 0
             if turf_type != 'none' and area > 0:
-                turf_price = turf_prices.get(turf_type, 0)
-                subtotal += turf_price * area
+                subtotal += INVOICE_TURF_PRICES.get(turf_type, 0) * area
             
             # Add extras
             if artificial_hedges_qty > 0:
-                subtotal += artificial_hedges_qty * 15.00
+                subtotal += artificial_hedges_qty * EXTRAS_COSTS['artificial_hedges']
             if fountain_price > 0:
                 subtotal += fountain_price
             if bamboo_products_qty > 0:
-                bamboo_prices = {'2m': 20.00, '2.4m': 25.00, '1.8m': 18.00}
-                bamboo_price = bamboo_prices.get(bamboo_products_size, 0)
-                subtotal += bamboo_products_qty * bamboo_price
+                subtotal += bamboo_products_qty * BAMBOO_PRICES.get(bamboo_products_size, 0)
             if pebbles_qty > 0:
-                subtotal += pebbles_qty * 5.50  # Average pebble price
+                subtotal += pebbles_qty * EXTRAS_COSTS['pebbles']
             if pegs_qty > 0:
-                subtotal += pegs_qty * 2.50
+                subtotal += pegs_qty * EXTRAS_COSTS['pegs']
             if adhesive_tape_qty > 0:
-                subtotal += adhesive_tape_qty * 8.00
+                subtotal += adhesive_tape_qty * EXTRAS_COSTS['adhesive_tape']
             
             # Calculate GST and total
             gst_amount = subtotal * 0.10 if gst_checkbox == 'yes' else 0
@@ -825,9 +1024,10 @@ def invoice():
             
             extras_text = ', '.join(extras_list) if extras_list else ''
             
-            # Calculate due date (30 days from now)
-            from datetime import datetime, timedelta
-            due_date = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
+            # Created and due dates (30 days out) share one clock read
+            now = datetime.now()
+            created_date = now.isoformat(sep=' ', timespec='seconds')
+            due_date = (now + timedelta(days=30)).date().isoformat()
             
             # Save invoice
             db_exec('''INSERT INTO invoices 
@@ -837,7 +1037,7 @@ def invoice():
                        pegs_qty, adhesive_tape_qty)
                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
                     (client_name, turf_type, area, payment_status, gst_amount, subtotal, total, 
-                     extras_text, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), due_date, 
+                     extras_text, created_date, due_date, 
                      session['user_id'], artificial_hedges_qty, fountain_price, bamboo_products_size,
                      bamboo_products_qty, pebbles_custom_type, pebbles_qty, pegs_qty, adhesive_tape_qty))
             
@@ -847,27 +1047,65 @@ def invoice():
         except Exception as e:
             flash(f'Error creating invoice: {str(e)}')
     
-    # Get clients for dropdown autocomplete
-    clients_data = db_exec('SELECT client_name FROM clients WHERE owner_id = ? ORDER BY client_name', (session['user_id'],), 'all') or []
-    clients = [client[0] for client in clients_data]
+    # Get clients for dropdown autocomplete; the name list only changes with the clients table, so it is
+    # cached under that table's data version (which also moves on other workers' writes)
+    user_id = session['user_id']
+    clients = cached(('client_names', user_id, get_data_version('clients')), lambda: [client['client_name'] for client in
+                     db_exec('SELECT client_name FROM clients WHERE owner_id = ? ORDER BY client_name', (user_id,), 'all') or []])
     
-    # Get invoices for display
-    invoices_data = db_exec('SELECT * FROM invoices WHERE owner_id = ? ORDER BY id DESC', (session['user_id'],), 'all') or []
+    # One page of invoices, newest first; one extra row is fetched to tell whether a next page exists
+    page = get_page()
+    invoices_data = db_exec(INVOICE_PAGE_SQL, (user_id, PAGE_SIZE + 1, (page - 1) * PAGE_SIZE), 'all') or []
     
-    return render_template('invoice.html', clients=clients, invoices=invoices_data)
+    # Stream the page so the head, sidebar and form flush before the invoice table is rendered
+    return stream_template('invoice.html', clients=clients, invoices=invoices_data[:PAGE_SIZE], page=page, has_next=len(invoices_data) > PAGE_SIZE)
+
+# API field name -> tasks column, shared by the task list and detail endpoints
+TASK_JSON_FIELDS = (('id', 'id'), ('title', 'title'), ('description', 'description'), ('date', 'task_date'), ('time', 'task_time'), ('end_time', 'task_end_time'), ('location', 'location'), ('status', 'status'), ('created_at', 'created_at'), ('assigned_user_id', 'assigned_user_id'))
+
+TASK_JSON_COLUMNS = ', '.join(column for _, column in TASK_JSON_FIELDS)
+# Same columns qualified for get_all_tasks(), whose users join would make id/created_at ambiguous
+TASK_LIST_COLUMNS = ', '.join('tasks.' + column for _, column in TASK_JSON_FIELDS)
+# Built once, so every detail lookup passes the identical string and hits the connection's statement cache
+TASK_DETAIL_SQL = f'SELECT {TASK_JSON_COLUMNS} FROM tasks WHERE id = ? AND owner_id = ?'
+
+def task_to_json(task):
+    return {key: task[column] for key, column in TASK_JSON_FIELDS}
+
+# Every API response goes through here: orjson when installed (encodes straight to bytes), else jsonify
+def json_response(payload):
+    if orjson is None: return jsonify(payload)
+    return app.response_class(orjson.dumps(payload), mimetype='application/json')
+
+# Constant API bodies are encoded once at import. Each request still gets its own Response object,
+# since Flask modifies responses after the view returns (e.g. the session's Set-Cookie header)
+UNAUTHORIZED_JSON = app.json.dumps({'error': 'Unauthorized'})
+ACCESS_DENIED_JSON = app.json.dumps({'error': 'Access denied'})
+TASK_NOT_FOUND_JSON = app.json.dumps({'error': 'Task not found'})
+TASK_CREATED_JSON = app.json.dumps({'success': True, 'message': 'Task created successfully'})
+TASK_UPDATED_JSON = app.json.dumps({'success': True, 'message': 'Task updated successfully'})
+TASK_DELETED_JSON = app.json.dumps({'success': True, 'message': 'Task deleted successfully'})
+
+def json_body_response(body):
+    return app.response_class(body, mimetype='application/json')
 
 @app.route('/api/tasks', methods=['GET'])
 def get_all_tasks_api():
-    if 'user_id' not in session: return jsonify({'error': 'Unauthorized'}), 401
-    tasks = get_all_tasks()
-    return jsonify([{'id': t[0], 'title': t[1], 'description': t[2], 'date': t[3], 'time': t[4], 'end_time': t[5], 'location': t[6], 'status': t[7], 'created_at': t[8], 'assigned_user_id': t[9] if len(t) > 9 else None} for t in tasks])
+    if 'user_id' not in session: return json_body_response(UNAUTHORIZED_JSON), 401
+    # Pollers that already hold the current version get an empty 304 instead of the full list
+    etag = f"tasks-{session['user_id']}-{get_tasks_version()}"
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = json_response([task_to_json(t) for t in get_all_tasks()])
+    response.set_etag(etag)
+    return response
 
 @app.route('/api/tasks', methods=['POST'], endpoint='add_task_api')
 def add_task():
-    if 'user_id' not in session: return jsonify({'error': 'Unauthorized'}), 401
+    if 'user_id' not in session: return json_body_response(UNAUTHORIZED_JSON), 401
     try:
         data = request.get_json()
-        print(f"DEBUG: Task creation data: {data}")  # Debug line
         
         # Validate required fields
         if not data.get('title'):
@@ -887,50 +1125,44 @@ def add_task():
                  data.get('assigned_user_id'), 
                  session['user_id']))
         
-        return jsonify({'success': True, 'message': 'Task created successfully'})
+        return json_body_response(TASK_CREATED_JSON)
     except Exception as e: 
-        print(f"DEBUG: Task creation error: {str(e)}")  # Debug line
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}), 500
 
 @app.route('/api/tasks/<int:task_id>', methods=['GET'])
 def get_task(task_id):
-    if 'user_id' not in session: return jsonify({'error': 'Unauthorized'}), 401
-    task = db_exec('SELECT * FROM tasks WHERE id = ? AND owner_id = ?', (task_id, session['user_id']), 'one')
-    if not task: return jsonify({'error': 'Task not found'}), 404
-    return jsonify({'id': task[0], 'title': task[1], 'description': task[2], 'date': task[3], 'time': task[4], 'end_time': task[8], 'location': task[5], 'status': task[6], 'created_at': task[7], 'assigned_user_id': task[10] if len(task) > 10 else None})
+    if 'user_id' not in session: return json_body_response(UNAUTHORIZED_JSON), 401
+    # Keyed on the tasks version, so an edit made by any worker is never served stale
+    user_id = session['user_id']
+    task = cached(('task', user_id, task_id, get_tasks_version()),
+                  lambda: db_exec(TASK_DETAIL_SQL, (task_id, user_id), 'one'))
+    if not task: return json_body_response(TASK_NOT_FOUND_JSON), 404
+    return json_response(task_to_json(task))
 
 @app.route('/api/tasks/<int:task_id>', methods=['PUT'])
 def update_task(task_id):
-    if 'user_id' not in session: return jsonify({'error': 'Unauthorized'}), 401
+    if 'user_id' not in session: return json_body_response(UNAUTHORIZED_JSON), 401
     data = request.get_json()
     try:
         db_exec('UPDATE tasks SET title=?, description=?, task_date=?, task_time=?, task_end_time=?, location=?, status=?, assigned_user_id=? WHERE id=? AND owner_id=?', (data.get('title'), data.get('description'), data.get('date'), data.get('time'), data.get('end_time'), data.get('location'), data.get('status'), data.get('assigned_user_id'), task_id, session['user_id']))
-        return jsonify({'success': True, 'message': 'Task updated successfully'})
-    except Exception as e: return jsonify({'error': str(e)}), 500
+        return json_body_response(TASK_UPDATED_JSON)
+    except Exception as e: return json_response({'error': str(e)}), 500
 
 @app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
-    if 'user_id' not in session: return jsonify({'error': 'Unauthorized'}), 401
+    if 'user_id' not in session: return json_body_response(UNAUTHORIZED_JSON), 401
     try:
         db_exec('DELETE FROM tasks WHERE id = ? AND owner_id = ?', (task_id, session['user_id']))
-        return jsonify({'success': True, 'message': 'Task deleted successfully'})
-    except Exception as e: return jsonify({'error': str(e)}), 500
+        return json_body_response(TASK_DELETED_JSON)
+    except Exception as e: return json_response({'error': str(e)}), 500
 
 @app.route('/api/admin-users', methods=['GET'])
 def get_admin_users():
-    if 'user_id' not in session: return jsonify({'error': 'Unauthorized'}), 401
-    if not has_permission('profiles'): return jsonify({'error': 'Access denied'}), 403
+    if 'user_id' not in session: return json_body_response(UNAUTHORIZED_JSON), 401
+    if not has_permission('profiles'): return json_body_response(ACCESS_DENIED_JSON), 403
     admins = db_exec('SELECT id, name, email, role FROM users WHERE role = "admin" ORDER BY id', fetch='all') or []
-    admin_list = []
-    for admin in admins:
-        admin_list.append({
-            'id': admin[0],
-            'name': admin[1],
-            'email': admin[2],
-            'role': admin[3],
-            'is_current_user': admin[0] == session['user_id']
-        })
-    return jsonify({'admins': admin_list})
+    current_user_id = session['user_id']
+    return json_response({'admins': [{**admin, 'is_current_user': admin['id'] == current_user_id} for admin in admins]})
 
 @app.route('/edit_invoice/<int:invoice_id>', methods=['GET', 'POST'])
 def edit_invoice(invoice_id):
@@ -938,7 +1170,7 @@ def edit_invoice(invoice_id):
         return redirect(url_for('login'))
     
     # Get the invoice data
-    invoice = db_exec('SELECT * FROM invoices WHERE id = ? AND owner_id = ?', (invoice_id, session['user_id']), fetch='one')
+    invoice = db_exec('SELECT id, client_name, turf_type, area, subtotal, gst, total, payment_status FROM invoices WHERE id = ? AND owner_id = ?', (invoice_id, session['user_id']), fetch='one')
     if not invoice:
         flash('Invoice not found or access denied.')
         return redirect(url_for('payments'))
@@ -965,18 +1197,9 @@ def edit_invoice(invoice_id):
     
     # Get clients for dropdown
     clients_data = db_exec('SELECT client_name FROM clients WHERE owner_id = ? ORDER BY client_name', (session['user_id'],), 'all') or []
-    clients = [client[0] for client in clients_data]
-    
-    # Price table for the template
-    price_table = {
-        'Golden Imperial Lush': 15.00,
-        'Golden Green Lush': 19.00,
-        'Golden Natural 40mm': 17.00,
-        'Golden Golf Turf': 22.00,
-        'Golden Premium Turf': 20.00
-    }
+    clients = [client['client_name'] for client in clients_data]
     
-    return render_template('edit_invoice.html', invoice=invoice, clients=clients, price_table=price_table)
+    return render_template('edit_invoice.html', invoice=invoice, clients=clients, price_table=QUOTE_TURF_PRICES)
 
 @app.route('/delete_invoice/<int:invoice_id>', methods=['POST'])
 def delete_invoice(invoice_id):
@@ -990,10 +1213,8 @@ def delete_invoice(invoice_id):
             flash('Invoice not found or access denied.')
             return redirect(url_for('payments'))
         
-        # Delete the invoice
+        # Delete the invoice; ids are not renumbered, which rewrote every later invoice row on each delete
         db_exec('DELETE FROM invoices WHERE id = ? AND owner_id = ?', (invoice_id, session['user_id']))
-        # Reset invoice IDs to start from 1 and fill gaps
-        reset_invoices_ids()
         flash('Invoice deleted successfully.')
     except Exception as e:
         flash(f'Error deleting invoice: {str(e)}')